@@ -4,6 +4,9 @@ import os
 import re
 from typing import Any, Dict
 
+from pwpatch import disable_stack_capture
+disable_stack_capture()
+
 from playwright.async_api import (
     async_playwright,
     Page,
@@ -32,8 +35,6 @@ from recorder.writer import JsonlWriter
 from recorder.hotkey import StopSignal, attach_hotkey
 from recorder.selectors import RECORDER_JS
 
-REDACTED = "••••••"
-
 # --------------------------------------------------------------------
 # Diagnostics
 # --------------------------------------------------------------------
@@ -85,38 +86,43 @@ REC_STARTER = """
 """.replace("%RECORDER_JS%", RECORDER_JS)
 
 async def inject_recorder(page: Page, writer: JsonlWriter):
-    async def record_event_binding(source, data: Dict[str, Any]):
-        try:
-            et = data.get("etype")
-            if et in ("input", "change"):
-                el = data.get("el") or {}
-                if (el.get("type") == "password") or (
-                    data.get("input_value") and data["input_value"] != REDACTED
-                ):
-                    data["input_value"] = REDACTED
-                    data["value"] = REDACTED
-                    if "el" in data:
-                        data["el"]["value_preview"] = REDACTED
-        except Exception:
-            pass
-
+    # Values arrive already masked: RECORDER_JS redacts passwords and typed
+    # input before queueing, so events go straight to disk.
+    def record_one(data: Dict[str, Any]):
         writer.write(data)
         if writer.count <= 3:
             print(f"   [rec] {data.get('etype')} @ {data.get('url')}")
 
+    async def record_event_binding(source, data: Dict[str, Any]):
+        # The page drains its queue as {batch: [...]}; single events (e.g. the
+        # diagnostics probe) still arrive bare.
+        batch = data.get("batch")
+        if batch is None:
+            record_one(data)
+            return
+        for item in batch:
+            if isinstance(item, dict):
+                record_one(item)
+
     # Make the bridge available to all frames on this page
     await page.expose_binding("__recordEventBridge", record_event_binding)
 
-    # Ensure all future documents (top + iframes) preload the recorder
-    page.context.add_init_script(REC_STARTER)
+    # Ensure all future documents (top + iframes) preload the recorder. This is
+    # registered once on the context; it covers every frame of every page.
+    await page.context.add_init_script(REC_STARTER)
+
+    # url each frame was last started at; the init script already starts the
+    # recorder in new documents, so this is only a backstop and must stay cheap
+    started: Dict[Frame, str] = {}
+    pending = set()
 
     async def _start_in_frame(fr: Frame):
         try:
-            await fr.add_init_script(REC_STARTER)
             await fr.evaluate(
                 "(()=>{ if (window.__webflowRecorder && window.__webflowRecorder.start) "
                 "window.__webflowRecorder.start(); return true; })()"
             )
+            started[fr] = fr.url
             try:
                 print(f"   [rec] attached → frame '{fr.name or '(no-name)'}' url={fr.url}")
             except:
@@ -127,15 +133,27 @@ async def inject_recorder(page: Page, writer: JsonlWriter):
             except:
                 pass
 
-    # Start now in main and existing frames
-    await _start_in_frame(page)
-    for fr in page.frames:
-        if fr is not page.main_frame:
-            await _start_in_frame(fr)
+    async def _restart_later(fr: Frame):
+        # SPAs fire bursts of framenavigated during route changes; settle first
+        await asyncio.sleep(0.2)
+        pending.discard(fr)
+        if fr.is_detached() or started.get(fr) == fr.url:
+            return
+        await _start_in_frame(fr)
+
+    def _schedule(fr: Frame):
+        if fr in pending:
+            return
+        pending.add(fr)
+        asyncio.create_task(_restart_later(fr))
+
+    # Start now in main and existing frames (independent calls; run together)
+    await asyncio.gather(*(_start_in_frame(fr) for fr in page.frames))
 
     # Re-attach when frames are added or navigated (SSO widgets, etc.)
-    page.on("frameattached", lambda fr: asyncio.create_task(_start_in_frame(fr)))
-    page.on("framenavigated", lambda fr: asyncio.create_task(_start_in_frame(fr)))
+    page.on("frameattached", _schedule)
+    page.on("framenavigated", _schedule)
+    page.on("framedetached", lambda fr: started.pop(fr, None))
 
     # Optional: echo browser console for debugging
     page.on("console", lambda msg: print(f"   [console] {msg.type}: {msg.text}"))
@@ -147,12 +165,49 @@ async def inject_recorder(page: Page, writer: JsonlWriter):
 EMAIL_PAT = re.compile(r"e[-\s]*mail|user(name)?|login", re.I)
 PASS_PAT  = re.compile(r"pass(word)?", re.I)
 
-async def _visible_first(loc):
-    try:
-        await loc.first.wait_for(state="visible", timeout=3000)
-        return loc.first
-    except Exception:
-        return None
+# Stops a frame's recorder, flushing whatever it still has queued
+STOP_RECORDER_JS = "window.__webflowRecorder && window.__webflowRecorder.stop()"
+
+# Picks the username and password fields of a frame in one evaluate. The
+# winners are tagged with data-wf-autofill so Python can address them with a
+# plain attribute selector; a snippet comes back for logging.
+PICK_LOGIN_FIELDS_JS = """({ userPat, passPat }) => {
+  const USER = new RegExp(userPat, 'i');
+  const PASS = new RegExp(passPat, 'i');
+  for (const old of document.querySelectorAll('[data-wf-autofill]')) old.removeAttribute('data-wf-autofill');
+
+  let user = null, userScore = 0, pass = null, passScore = 0;
+  // hidden/non-text inputs are excluded by the selector itself, in one native query
+  const fields = document.querySelectorAll(
+    ':is(input,textarea,[contenteditable=""],[contenteditable="true"],[role="textbox"])' +
+    ':not([type="hidden" i],[type="checkbox" i],[type="radio" i],[type="submit" i],[type="button" i],[aria-hidden="true"])'
+  );
+  for (const el of fields) {
+    const type = (el.getAttribute('type') || '').toLowerCase();
+    const r = el.getBoundingClientRect();
+    if (!(r.width > 0 && r.height > 0)) continue;
+
+    const labels = el.labels ? Array.from(el.labels, l => l.innerText || '') : [];
+    const hay = [
+      el.id, el.getAttribute('name'), el.getAttribute('placeholder'),
+      el.getAttribute('aria-label'), el.getAttribute('autocomplete'), ...labels
+    ].filter(Boolean).join(' ');
+
+    const ps = type === 'password' ? 3 : (PASS.test(hay) ? 2 : 0);
+    if (ps > passScore) { pass = el; passScore = ps; }
+    if (ps) continue;
+
+    const us = type === 'email' ? 3 : (USER.test(hay) ? 2 : 0);
+    if (us > userScore) { user = el; userScore = us; }
+  }
+
+  const mark = (el, tag) => {
+    if (!el) return null;
+    el.setAttribute('data-wf-autofill', tag);
+    return { sel: `[data-wf-autofill="${tag}"]`, snip: el.outerHTML.slice(0, 120) };
+  };
+  return { user: mark(user, 'user'), pass: mark(pass, 'pass') };
+}"""
 
 async def _try_fill(locator, value: str) -> bool:
     if not locator:
@@ -184,90 +239,6 @@ async def _try_fill(locator, value: str) -> bool:
     except Exception:
         return False
 
-async def _find_email_candidates(scope):
-    cands = []
-    cands.append(await _visible_first(scope.get_by_label(re.compile(r"email|user(name)?|login", re.I))))
-    cands.append(await _visible_first(scope.get_by_placeholder(re.compile(r"email|user(name)?|login", re.I))))
-    cands.append(await _visible_first(scope.get_by_role("textbox", name=re.compile(r"email|user(name)?|login", re.I))))
-
-    attr_sel = ",".join([
-        'input[type="email"]',
-        'input[type="text"]',
-        'input[name*="email" i]',
-        'input[id*="email" i]',
-        'input[name*="user" i]',
-        'input[id*="user" i]',
-        'input[name*="login" i]',
-        'input[id*="login" i]',
-        '[role="textbox"]',
-        '[contenteditable=""]',
-        '[contenteditable="true"]'
-    ])
-    loc = scope.locator(attr_sel).filter(has_not=scope.locator(':is([type="hidden"],[aria-hidden="true"])'))
-    max_scan = min(10, await loc.count())
-    for i in range(max_scan):
-        el = loc.nth(i)
-        attrs = await el.evaluate("""el => ({
-            id: el.id || '',
-            name: el.name || '',
-            ph: el.getAttribute('placeholder') || '',
-            aria: el.getAttribute('aria-label') || '',
-            type: el.getAttribute('type') || ''
-        })""")
-        hay = " ".join(attrs.values())
-        if EMAIL_PAT.search(hay) or attrs["type"].lower() == "email":
-            cands.append(el)
-
-    uniq = []
-    seen = set()
-    for el in cands:
-        if not el:
-            continue
-        try:
-            box = await el.bounding_box()
-            if not box:
-                continue
-            key = await el.evaluate("el => el.outerHTML.slice(0,200)")
-            if key in seen:
-                continue
-            seen.add(key)
-            uniq.append(el)
-        except Exception:
-            pass
-    return uniq
-
-async def _find_password_candidates(scope):
-    cands = []
-    cands.append(await _visible_first(scope.get_by_label(re.compile(r"pass(word)?", re.I))))
-    cands.append(await _visible_first(scope.get_by_placeholder(re.compile(r"pass(word)?", re.I))))
-    attr_sel = ",".join([
-        'input[type="password"]',
-        'input[name*="pass" i]',
-        'input[id*="pass" i]'
-    ])
-    loc = scope.locator(attr_sel)
-    max_scan = min(8, await loc.count())
-    for i in range(max_scan):
-        cands.append(loc.nth(i))
-
-    uniq = []
-    seen = set()
-    for el in cands:
-        if not el:
-            continue
-        try:
-            box = await el.bounding_box()
-            if not box:
-                continue
-            key = await el.evaluate("el => el.outerHTML.slice(0,200)")
-            if key in seen:
-                continue
-            seen.add(key)
-            uniq.append(el)
-        except Exception:
-            pass
-    return uniq
-
 async def _scopes(page: Page):
     scopes = [page]
     try:
@@ -314,35 +285,33 @@ async def try_autofill_login(page: Page) -> bool:
     except Exception:
         pass
 
-    for scope in await _scopes(page):
-        if not filled_u:
-            email_cands = await _find_email_candidates(scope)
-            for el in email_cands:
-                ok = await _try_fill(el, USERNAME)
-                if ok:
-                    try:
-                        snip = await el.evaluate("el => el.outerHTML.slice(0,120)")
-                    except Exception:
-                        snip = "<element>"
-                    print("✅ Filled username/email via:", snip)
+    # Fields often render a moment after domcontentloaded; rescan briefly.
+    for _ in range(6):
+        for scope in await _scopes(page):
+            try:
+                picked = await scope.evaluate(
+                    PICK_LOGIN_FIELDS_JS,
+                    {"userPat": EMAIL_PAT.pattern, "passPat": PASS_PAT.pattern},
+                )
+            except Exception:
+                continue
+
+            if not filled_u and picked.get("user"):
+                if await _try_fill(scope.locator(picked["user"]["sel"]).first, USERNAME):
+                    print("✅ Filled username/email via:", picked["user"]["snip"])
                     filled_u = True
-                    break
 
-        if not filled_p:
-            pw_cands = await _find_password_candidates(scope)
-            for el in pw_cands:
-                ok = await _try_fill(el, PASSWORD)
-                if ok:
-                    try:
-                        snip = await el.evaluate("el => el.outerHTML.slice(0,120)")
-                    except Exception:
-                        snip = "<element>"
-                    print("✅ Filled password via:", snip)
+            if not filled_p and picked.get("pass"):
+                if await _try_fill(scope.locator(picked["pass"]["sel"]).first, PASSWORD):
+                    print("✅ Filled password via:", picked["pass"]["snip"])
                     filled_p = True
-                    break
+
+            if filled_u and filled_p:
+                break
 
         if filled_u and filled_p:
             break
+        await page.wait_for_timeout(500)
 
     if not filled_u:
         print("⚠️  Could not locate username/email field after all strategies.")
@@ -358,48 +327,59 @@ async def try_autofill_login(page: Page) -> bool:
 async def main():
     os.makedirs(RECORDINGS_DIR, exist_ok=True)
     writer = JsonlWriter(RECORDINGS_DIR)
-    stop_signal = StopSignal()
-    attach_hotkey(STOP_HOTKEY, stop_signal)
-    print(f"⏺  Recording started. Hotkey to stop: {STOP_HOTKEY}")
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=HEADLESS, args=["--start-maximized"])
-        context = await browser.new_context(viewport=VIEWPORT, record_video_dir=None)
-        page = await context.new_page()
-
-        # IMPORTANT: Inject recorder BEFORE navigation so all future docs/frames preload it
-        await inject_recorder(page, writer)
-
-        print(f"→ navigating to: {URL}")
-        await page.goto(URL, wait_until="domcontentloaded")
-
-        # Quick diagnostics (frames + synthetic event)
-        await _diag_probe(page)
+    # the writer buffers; whatever ends the session (Ctrl+C, an exception),
+    # flush what was recorded
+    try:
+        stop_signal = StopSignal()
+        attach_hotkey(STOP_HOTKEY, stop_signal)
+        print(f"⏺  Recording started. Hotkey to stop: {STOP_HOTKEY}")
+
+        async with async_playwright() as p:
+            # Ctrl+C may be our stop key; keep Playwright from also closing
+            # the browser on it, so the stop below can still drain the pages
+            browser = await p.chromium.launch(
+                headless=HEADLESS, args=["--start-maximized"], handle_sigint=False
+            )
+            context = await browser.new_context(viewport=VIEWPORT, record_video_dir=None)
+            page = await context.new_page()
 
-        # Autofill (you click Login so the click is recorded)
-        try:
-            ok = await try_autofill_login(page)
-            if ok:
-                print("✅ Autofill complete. Proceed with your flow…")
-            else:
-                print("ℹ️  Autofill best effort done; proceed manually if needed.")
-        except Exception as e:
-            print(f"⚠️  Autofill error: {e}. You can still proceed manually; actions will be recorded.")
+            # IMPORTANT: Inject recorder BEFORE navigation so all future docs/frames preload it
+            await inject_recorder(page, writer)
 
-        # Keep alive until you hit the stop hotkey
-        while not stop_signal.triggered:
-            await asyncio.sleep(0.1)
+            print(f"→ navigating to: {URL}")
+            await page.goto(URL, wait_until="domcontentloaded")
 
-        # Stop recorder (best-effort)
-        try:
-            await page.evaluate("window.__webflowRecorder && window.__webflowRecorder.stop()")
-        except Exception:
-            pass
+            # Quick diagnostics (frames + synthetic event)
+            await _diag_probe(page)
 
-        await context.close()
-        await browser.close()
+            # Autofill (you click Login so the click is recorded)
+            try:
+                ok = await try_autofill_login(page)
+                if ok:
+                    print("✅ Autofill complete. Proceed with your flow…")
+                else:
+                    print("ℹ️  Autofill best effort done; proceed manually if needed.")
+            except Exception as e:
+                print(f"⚠️  Autofill error: {e}. You can still proceed manually; actions will be recorded.")
+
+            # Keep alive until you hit the stop hotkey
+            await stop_signal.wait()
+
+            # Stop recorder (best-effort) in every frame: each one queues its
+            # own events and pending input, and stop() drains them
+            await asyncio.gather(
+                *(fr.evaluate(STOP_RECORDER_JS) for fr in page.frames),
+                return_exceptions=True,
+            )
 
-    writer.close()
+            # best-effort too: the browser may already be gone
+            try:
+                await context.close()
+                await browser.close()
+            except Exception:
+                pass
+    finally:
+        writer.close()
     print(f"💾 Saved recording with {writer.count} events → {writer.path}")
     print("Done.")
 
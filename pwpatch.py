@@ -0,0 +1,23 @@
+# pwpatch.py
+# Playwright walks inspect.stack() on every API call to attribute trace
+# sources. Neither the recorder nor the replayer uses that, so skip the walk
+# unless WF_PW_STACK=1 is set for debugging.
+import inspect
+import os
+
+class _NoStackInspect:
+    def __getattr__(self, name):
+        return getattr(inspect, name)
+
+    @staticmethod
+    def stack(*args, **kwargs):
+        return []
+
+def disable_stack_capture():
+    if os.environ.get("WF_PW_STACK"):
+        return
+    try:
+        import playwright._impl._connection as _pw_connection
+        _pw_connection.inspect = _NoStackInspect()
+    except Exception:
+        pass
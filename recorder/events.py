@@ -1,5 +1,8 @@
 # recorder/events.py
-from pydantic import BaseModel, Field
+# Shape of the records written to session-*.jsonl. The recorder itself writes
+# the raw dicts it gets from the page, so these are plain dataclasses (no
+# runtime validation) describing that format.
+from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, Literal
 from datetime import datetime
 
@@ -7,29 +10,33 @@ EventType = Literal[
     "nav", "click", "input", "keydown", "change", "submit", "visibility"
 ]
 
-class SelectorInfo(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class SelectorInfo:
     css: Optional[str] = None
     xpath: Optional[str] = None
 
-class ElementInfo(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ElementInfo:
     tag: Optional[str] = None
     id: Optional[str] = None
     classes: Optional[str] = None
     name: Optional[str] = None
     type: Optional[str] = None
     role: Optional[str] = None
-    aria_label: Optional[str] = Field(None, alias="ariaLabel")
+    aria_label: Optional[str] = None  # "ariaLabel" in the JSONL
     title: Optional[str] = None
     text: Optional[str] = None  # small/trimmed
     value_preview: Optional[str] = None  # masked for passwords
     selectors: Optional[SelectorInfo] = None
 
-class BaseEvent(BaseModel):
-    t: str = Field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+@dataclass(slots=True, kw_only=True)
+class BaseEvent:
+    t: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
     etype: EventType
     url: Optional[str] = None
-    meta: Dict[str, Any] = Field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
 
+@dataclass(slots=True, kw_only=True)
 class ClickEvent(BaseEvent):
     etype: Literal["click"] = "click"
     x: int
@@ -37,11 +44,13 @@ class ClickEvent(BaseEvent):
     button: Literal["left", "middle", "right"] = "left"
     el: Optional[ElementInfo] = None
 
+@dataclass(slots=True, kw_only=True)
 class InputEvent(BaseEvent):
     etype: Literal["input"] = "input"
     el: Optional[ElementInfo] = None
     input_value: Optional[str] = None  # masked if password
 
+@dataclass(slots=True, kw_only=True)
 class KeyEvent(BaseEvent):
     etype: Literal["keydown"] = "keydown"
     key: str
@@ -51,20 +60,24 @@ class KeyEvent(BaseEvent):
     shift: bool
     meta_key: bool
 
+@dataclass(slots=True, kw_only=True)
 class ChangeEvent(BaseEvent):
     etype: Literal["change"] = "change"
     el: Optional[ElementInfo] = None
     value: Optional[str] = None
 
+@dataclass(slots=True, kw_only=True)
 class SubmitEvent(BaseEvent):
     etype: Literal["submit"] = "submit"
     el: Optional[ElementInfo] = None
 
+@dataclass(slots=True, kw_only=True)
 class NavEvent(BaseEvent):
     etype: Literal["nav"] = "nav"
     from_url: Optional[str] = None
     to_url: Optional[str] = None
 
+@dataclass(slots=True, kw_only=True)
 class VisibilityEvent(BaseEvent):
     etype: Literal["visibility"] = "visibility"
     state: Literal["visible", "hidden"]
@@ -1,29 +1,54 @@
 # recorder/hotkey.py
-import threading
-import keyboard  # requires admin on Windows sometimes
+import asyncio
+import signal as _signal
+
+# Hotkeys that are just the terminal's interrupt; these need no keyboard hook
+SIGINT_HOTKEYS = ("ctrl+c", "sigint")
 
 class StopSignal:
     def __init__(self):
-        self._flag = False
-        self._lock = threading.Lock()
+        self._event = asyncio.Event()
+        self._loop = None
 
     @property
     def triggered(self) -> bool:
-        with self._lock:
-            return self._flag
+        return self._event.is_set()
 
     def trigger(self):
-        with self._lock:
-            self._flag = True
+        # keyboard callbacks run on its listener thread; hop onto the loop
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._event.set)
+        else:
+            self._event.set()
+
+    async def wait(self):
+        await self._event.wait()
 
+# Call from the running event loop that will await signal.wait()
 def attach_hotkey(hotkey: str, signal: StopSignal):
+    signal._loop = asyncio.get_running_loop()
+
     def _cb():
         signal.trigger()
         # print kept minimal; main loop will notice
         print("\n🛑 Stop hotkey detected.")
 
-    t = threading.Thread(
-        target=lambda: keyboard.add_hotkey(hotkey, _cb), daemon=True
-    )
-    t.start()
-    return t
+    def _attach_sigint():
+        try:
+            signal._loop.add_signal_handler(_signal.SIGINT, _cb)
+        except NotImplementedError:  # Windows event loops
+            _signal.signal(_signal.SIGINT, lambda *_: _cb())
+        return None
+
+    if hotkey.strip().lower() in SIGINT_HOTKEYS:
+        return _attach_sigint()
+
+    # keyboard runs its own listener thread; no need for another one. It needs
+    # root on Linux/macOS (and sometimes admin on Windows), and fails here if
+    # it can't hook the keyboard; Ctrl+C still stops the recording then.
+    try:
+        import keyboard
+        return keyboard.add_hotkey(hotkey, _cb)
+    except Exception as e:
+        print(f"⚠️  Could not register hotkey {hotkey!r} ({e}); press Ctrl+C to stop instead.")
+        return _attach_sigint()
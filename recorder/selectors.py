@@ -1,20 +1,25 @@
 # recorder/selectors.py
 RECORDER_JS = r"""
 (() => {
+  const TEXT_MAX = 60;
+  const VALUE_MAX = 40;
+  const MASK = "••••••";
+
+  const truncate = (v, n = VALUE_MAX) => v.length > n ? v.slice(0, n - 3) + "..." : v;
+
   // Build a short textual preview (safe) of innerText
   function textPreview(el) {
     try {
-      const t = (el.innerText || "").trim().replace(/\s+/g, " ");
-      return t.length > 60 ? t.slice(0, 57) + "..." : t;
+      return truncate((el.innerText || "").trim().replace(/\s+/g, " "), TEXT_MAX);
     } catch { return null; }
   }
 
+  // The one place values are read: passwords are masked here and nowhere else
   function valuePreview(el) {
     try {
-      if (el.tagName === "INPUT" && el.type === "password") return "••••••";
-      if (el.tagName === "INPUT" || el.tagName === "TEXTAREA") {
-        const v = (el.value ?? "").toString();
-        return v.length > 40 ? v.slice(0, 37) + "..." : v;
+      if (el.tagName === "INPUT" && el.type === "password") return MASK;
+      if (el.tagName === "INPUT" || el.tagName === "TEXTAREA" || el.tagName === "SELECT") {
+        return truncate((el.value ?? "").toString());
       }
       return null;
     } catch { return null; }
@@ -24,7 +29,8 @@ RECORDER_JS = r"""
     if (!(el instanceof Element)) return null;
     if (el.id) return `#${CSS.escape(el.id)}`;
     const parts = [];
-    while (el && el.nodeType === 1 && el.tagName.toLowerCase() !== "html") {
+    // collected leaf-first and reversed once at the end; depth capped at 7
+    for (let depth = 0; depth < 7 && el && el.nodeType === 1 && el.tagName.toLowerCase() !== "html"; depth++) {
       let part = el.tagName.toLowerCase();
       if (el.classList.length) {
         part += "." + Array.from(el.classList).map(c => CSS.escape(c)).join(".");
@@ -36,11 +42,10 @@ RECORDER_JS = r"""
         const idx = siblings.indexOf(el) + 1;
         part += `:nth-of-type(${idx})`;
       }
-      parts.unshift(part);
+      parts.push(part);
       el = parent;
-      if (parts.length > 6) break; // limit depth
     }
-    return parts.length ? parts.join(" > ") : null;
+    return parts.length ? parts.reverse().join(" > ") : null;
   }
 
   function xPath(el) {
@@ -55,30 +60,43 @@ RECORDER_JS = r"""
     };
     const segs = [];
     let e = el;
-    for (; e && e.nodeType === 1; e = e.parentNode) {
+    for (let depth = 0; depth < 9 && e && e.nodeType === 1; depth++, e = e.parentNode) {
       let tag = e.nodeName.toLowerCase();
       let i = idx(e);
-      segs.unshift(`${tag}[${i}]`);
-      if (segs.length > 8) break;
+      segs.push(`${tag}[${i}]`);
     }
-    return "//" + segs.join("/");
+    return "//" + segs.reverse().join("/");
   }
 
+  // Element descriptions are memoized per node: typing into one field fires
+  // many events on the same target, and the selector walks are the costly part.
+  // Only value_preview is recomputed, since that is what changes.
+  const infoCache = new WeakMap();
+
   function elInfo(el) {
     if (!el || !(el instanceof Element)) return null;
+    let info = infoCache.get(el);
+    if (!info) {
+      info = describe(el);
+      infoCache.set(el, info);
+    }
+    return { ...info, value_preview: valuePreview(el) };
+  }
+
+  function describe(el) {
     const role = el.getAttribute("role");
     const ariaLabel = el.getAttribute("aria-label");
     return {
       tag: el.tagName?.toLowerCase() ?? null,
       id: el.id || null,
-      classes: el.className || null,
+      // classList, not className: SVG className is an object, and the list is capped
+      classes: el.classList.length ? Array.from(el.classList).slice(0, 8).join(" ") : null,
       name: el.getAttribute("name"),
       type: el.getAttribute("type"),
       role: role || null,
       ariaLabel: ariaLabel || null,
       title: el.getAttribute("title"),
       text: textPreview(el),
-      value_preview: valuePreview(el),
       selectors: {
         css: cssPath(el),
         xpath: xPath(el)
@@ -86,10 +104,10 @@ RECORDER_JS = r"""
     };
   }
 
-  // Debounce helper for noisy input
-  const debounce = (fn, ms) => {
-    let t; return (...args) => { clearTimeout(t); t = setTimeout(() => fn(...args), ms); };
-  };
+  // Run fn when the browser is idle (or after ~150 ms at the latest)
+  const whenIdle = window.requestIdleCallback
+    ? (fn) => requestIdleCallback(fn, { timeout: 150 })
+    : (fn) => setTimeout(fn, 120);
 
   // Keep a single recorder instance
   if (window.__webflowRecorder) return;
@@ -99,18 +117,40 @@ RECORDER_JS = r"""
       if (this._active) return;
       this._active = true;
 
-      const send = (etype, payload) => {
-        if (!this._active) return;
+      // Events are queued and drained to Python in batches, so a burst of
+      // keystrokes costs one bridge round-trip instead of one per event.
+      const queue = window.__wfQueue = [];
+      this._drain = () => {
+        if (!queue.length) return;
         try {
           // binding defined by Python: window.__recordEventBridge
-          window.__recordEventBridge({ etype, ...payload });
+          window.__recordEventBridge({ batch: queue.splice(0) });
         } catch (e) {
           console.warn("recordEventBridge error", e);
         }
       };
+      this._drainTimer = setInterval(this._drain, 100);
+      // drain (pending input included) before the document goes away
+      this._drainAll = () => { this._flushInput(); this._drain(); };
+      window.addEventListener("pagehide", this._drainAll, true);
+
+      // Events that can move focus or submit: a pending input goes out first
+      // so it stays ahead of them. Ordinary keystrokes don't, or typing would
+      // never coalesce.
+      const FLUSHES_INPUT = new Set(["click", "change", "submit", "nav"]);
+      const FLUSH_KEYS = new Set(["Enter", "Tab"]);
+
+      const send = (etype, payload) => {
+        if (!this._active) return;
+        if (FLUSHES_INPUT.has(etype) || (etype === "keydown" && FLUSH_KEYS.has(payload.key))) {
+          this._flushInput();
+        }
+        queue.push({ etype, ...payload });
+      };
 
       // Clicks
       this._click = (e) => {
+        if (!e.isTrusted) return; // skip script-dispatched events
         const el = e.target;
         const info = elInfo(el);
         const btn = e.button === 1 ? "middle" : (e.button === 2 ? "right" : "left");
@@ -125,6 +165,7 @@ RECORDER_JS = r"""
 
       // Keydown
       this._keydown = (e) => {
+        if (!e.isTrusted) return;
         send("keydown", {
           url: location.href,
           key: e.key, code: e.code,
@@ -134,31 +175,58 @@ RECORDER_JS = r"""
       };
       window.addEventListener("keydown", this._keydown, true);
 
-      // Input/change (debounced a bit)
-      this._input = debounce((e) => {
-        const el = e.target;
-        if (!(el instanceof Element)) return;
+      // Input/change. Input events are coalesced: only the latest target is
+      // remembered and its value is read once typing pauses (INPUT_QUIET_MS)
+      // and the browser is idle.
+      const INPUT_QUIET_MS = 120;
+      let pendingInput = null;
+      let inputScheduled = false;
+      let lastInputAt = 0;
+      this._flushInput = () => {
+        const el = pendingInput;
+        pendingInput = null;
+        if (!el) return;
         const info = elInfo(el);
-        // never expose raw password
-        const val = (el.tagName === "INPUT" && el.type === "password") ? "••••••" : (el.value ?? null);
+        // typed text is never stored; replay infers credentials from the field
+        if (info.value_preview) info.value_preview = MASK;
         send("input", {
           url: location.href,
           el: info,
-          input_value: (val && val.length > 40) ? (val.slice(0, 37) + "...") : val,
+          input_value: info.value_preview,
           meta: {}
         });
-      }, 120);
+      };
+      this._input = (e) => {
+        if (!e.isTrusted) return;
+        const el = e.target;
+        if (!(el instanceof Element)) return;
+        if (pendingInput && pendingInput !== el) this._flushInput();
+        pendingInput = el;
+        lastInputAt = performance.now();
+        if (inputScheduled) return;
+        inputScheduled = true;
+        const onIdle = () => {
+          // still typing: wait for the next idle period instead of re-arming a timer
+          if (performance.now() - lastInputAt < INPUT_QUIET_MS) {
+            whenIdle(onIdle);
+            return;
+          }
+          inputScheduled = false;
+          this._flushInput();
+        };
+        whenIdle(onIdle);
+      };
       window.addEventListener("input", this._input, true);
 
       this._change = (e) => {
+        if (!e.isTrusted) return;
         const el = e.target;
         if (!(el instanceof Element)) return;
         const info = elInfo(el);
-        const val = (el.tagName === "INPUT" && el.type === "password") ? "••••••" : (el.value ?? null);
         send("change", {
           url: location.href,
           el: info,
-          value: (val && val.length > 40) ? (val.slice(0, 37) + "...") : val,
+          value: info.value_preview,
           meta: {}
         });
       };
@@ -166,6 +234,7 @@ RECORDER_JS = r"""
 
       // Form submit
       this._submit = (e) => {
+        if (!e.isTrusted) return;
         const el = e.target;
         send("submit", { url: location.href, el: elInfo(el), meta: {} });
       };
@@ -188,6 +257,9 @@ RECORDER_JS = r"""
     },
     stop() {
       if (!this._active) return;
+      this._drainAll();
+      clearInterval(this._drainTimer);
+      window.removeEventListener("pagehide", this._drainAll, true);
       window.removeEventListener("click", this._click, true);
       window.removeEventListener("keydown", this._keydown, true);
       window.removeEventListener("input", this._input, true);
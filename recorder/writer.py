@@ -1,27 +1,41 @@
 # recorder/writer.py
 import os
+import time
 from datetime import datetime
 import orjson
 from typing import Any, Dict
 
+FLUSH_BYTES = 64 * 1024   # flush once this much is buffered...
+FLUSH_SECS = 0.25         # ...or this long after the last flush
+
 class JsonlWriter:
     def __init__(self, out_dir: str):
         os.makedirs(out_dir, exist_ok=True)
         stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
         self.path = os.path.join(out_dir, f"session-{stamp}.jsonl")
         self._f = open(self.path, "ab")
+        self._buf = bytearray()
+        self._last_flush = time.monotonic()
+        self._debug = bool(os.environ.get("WF_DEBUG"))
         self.count = 0
 
     def write(self, event_obj: Dict[str, Any]):
-        self._f.write(orjson.dumps(event_obj))
-        self._f.write(b"\n")
-        self._f.flush()
+        self._buf += orjson.dumps(event_obj, option=orjson.OPT_APPEND_NEWLINE)
         self.count += 1
-        if self.count <= 3:   # <— debug: confirms events are flowing
+        if self._debug and self.count <= 3:   # <— debug: confirms events are flowing
             print(f"[writer] events={self.count}")
+        if len(self._buf) >= FLUSH_BYTES or time.monotonic() - self._last_flush >= FLUSH_SECS:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            self._f.write(self._buf)
+            self._buf.clear()
+        self._f.flush()
+        self._last_flush = time.monotonic()
 
     def close(self):
         try:
-            self._f.flush()
+            self.flush()
         finally:
             self._f.close()
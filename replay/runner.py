@@ -1,9 +1,12 @@
 # replay/runner.py
-import asyncio, re, sys, orjson, time
-from typing import Any, Dict, List, Optional
+import asyncio, atexit, collections, functools, logging, logging.handlers, queue, re, sys, orjson
+from typing import Any, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from datetime import datetime
 
-from playwright.async_api import async_playwright, Page
+from pwpatch import disable_stack_capture
+from playwright.async_api import async_playwright, Page, Locator
 
 # ===== KNOBS you can tune =====
 HEADLESS = False
@@ -11,27 +14,48 @@ VIEWPORT = {"width": 1600, "height": 900}
 
 # Pace/visibility
 SLOWMO_MS = 150               # slows all Playwright ops (visible human-like)
-STEP_DELAY_MS = 350           # added after each step
+STEP_DELAY_MS = 350           # added after each step (local sleep; no browser round-trip)
 USE_TIMESTAMP_PACING = True   # respect original timing gaps between events
 TIMESCALE = 1.0               # 1.0 = real-time, 0.5 = 2x faster, 2.0 = 2x slower
 MAX_GAP_MS = 1500             # cap very long idle times from the recording
 
 # Waiting strategy
-WAIT_AFTER_CLICK_MS = 250
+SETTLE_BUDGET_MS = 1500       # max time a click waits for the page to settle
 WAIT_FOR_URL_CHANGE = True
 WAIT_FOR_NETWORKIDLE = True
 NETWORKIDLE_TIMEOUT_MS = 8000
 DOMCONTENT_TIMEOUT_MS = 8000
+LOCATOR_TIMEOUT_MS = 3000     # how long to wait for a recorded element to show up
 
 # Replay end behavior
 FINAL_PAUSE_SEC = 15          # keep browser open at the end (set 0 to auto-close)
 
-# Optional trace (view with: playwright show-trace trace.zip)
+# Optional trace (view with: playwright show-trace trace.zip). Tracing needs
+# Playwright's call-stack capture, which is otherwise skipped (see pwpatch.py);
+# set WF_PW_STACK=1 to keep it on without tracing, e.g. for API names in errors.
 TRACE_ON = False
 TRACE_PATH = "trace.zip"
 
+if not TRACE_ON:
+    disable_stack_capture()
+
 REDACTED = "••••••"
 
+# ===== Progress output =====
+# Lines go through a queue and are written by a listener thread, so a slow or
+# redirected stdout never stalls the event loop driving the browser.
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter("%(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # stop() drains what is still queued
+
+log = logging.getLogger("replay")
+log.setLevel(logging.INFO)
+log.propagate = False
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+
 # ===== Optional: credentials autofill during replay =====
 try:
     from config import USERNAME, PASSWORD
@@ -47,8 +71,9 @@ except Exception:
 
 EMAIL_PAT = re.compile(r"(e[-\s]*mail|user(name)?|login|account)", re.I)
 PASS_PAT  = re.compile(r"pass(word)?", re.I)
+TRANSITIONAL_PAT = re.compile(r"(continue|next|login|sign\s*in|submit)", re.I)  # buttons that may lead to a login step
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ElementInfo:
     tag: Optional[str] = None
     id: Optional[str] = None
@@ -84,82 +109,229 @@ def _el_from_event(ev: Dict[str, Any]) -> ElementInfo:
 def _role_to_aria(role: Optional[str]) -> Optional[str]:
     return role or None
 
-async def _best_locator(page: Page, info: ElementInfo):
-    # Priority: explicit CSS → #id → role+name → visible text → XPath → [name]
-    cands = []
+# Index of the first selector whose element is rendered and not hidden, or -1.
+# Invalid selectors are skipped rather than failing the whole batch.
+FIRST_VISIBLE_JS = """(sels) => {
+  for (let i = 0; i < sels.length; i++) {
+    let el = null;
+    try {
+      el = sels[i].xpath
+        ? document.evaluate(sels[i].xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(sels[i].css);
+    } catch { continue; }
+    if (!(el instanceof Element)) continue;
+    const r = el.getBoundingClientRect();
+    if (r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== "hidden") return i;
+  }
+  return -1;
+}"""
+
+CSS_IDENT_PAT = re.compile(r"-?[A-Za-z_][\w-]*")
+CSS_SPECIAL_PAT = re.compile(r"[^\w-]")
+
+# Python take on CSS.escape(): ids like "email:input" or "a.b/c" would
+# otherwise make the selector unparsable
+def _css_escape(ident: str) -> str:
+    if CSS_IDENT_PAT.fullmatch(ident):
+        return ident
+    def _esc(m):
+        c = m.group(0)
+        return f"\\{ord(c):x} " if ord(c) < 0x20 or c == "\x7f" else "\\" + c
+    out = CSS_SPECIAL_PAT.sub(_esc, ident)
+    if out == "-":
+        return "\\-"
+    # an identifier can't start with a digit (or '-' + digit)
+    lead = 1 if out.startswith("-") else 0
+    if out[lead:lead + 1].isdigit():
+        out = f"{out[:lead]}\\{ord(out[lead]):x} {out[lead + 1:]}"
+    return out
+
+def _css_string(value: str) -> str:
+    # for use inside a double-quoted CSS attribute value
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+@functools.lru_cache(maxsize=512)
+def _ci_regex(text: str) -> "re.Pattern[str]":
+    return re.compile(re.escape(text), re.I)
+
+# Resolved locators by element fingerprint; recordings hit the same few
+# elements over and over. Cleared per replay since locators are page-bound.
+_locator_cache: Dict[Tuple, Locator] = {}
+
+# How often each role/text candidate kind (role, button, text) resolved an
+# element; used to try the usual winner first
+_LOC_WINS: "collections.Counter[str]" = collections.Counter()
+
+def _locator_key(info: ElementInfo) -> Tuple:
+    return (
+        info.selectors_css, info.id, info.role,
+        info.aria_label or info.title or info.text,
+        info.selectors_xpath, info.name, info.tag,
+    )
 
+async def _best_locator(page: Page, info: ElementInfo):
+    key = _locator_key(info)
+    cached = _locator_cache.get(key)
+    if cached is not None:
+        try:
+            if await cached.is_visible():
+                return cached
+        except Exception:
+            pass
+        del _locator_cache[key]
+
+    # Selector candidates (CSS → #id → XPath → [name]) are probed together in
+    # the page, in this fixed order: most to least specific, and one evaluate
+    # whatever the order. Role/text candidates need Playwright's engine, one
+    # round-trip each, so those are tried in order of past wins (stable sort,
+    # so ties keep the default priority).
+    sels: List[Dict[str, str]] = []
     if info.selectors_css:
-        cands.append(page.locator(info.selectors_css))
+        sels.append({"css": info.selectors_css})
     if info.id:
-        cands.append(page.locator(f"#{info.id}"))
+        sels.append({"css": f"#{_css_escape(info.id)}"})
+    if info.selectors_xpath:
+        sels.append({"xpath": info.selectors_xpath})
+    if info.name:
+        sels.append({"css": f'[name="{_css_string(info.name)}"]'})
 
+    role_cands = []
     role = _role_to_aria(info.role)
     name_source = info.aria_label or info.title or info.text or ""
     if role and name_source:
-        cands.append(page.get_by_role(role, name=re.compile(re.escape(name_source), re.I)))
+        role_cands.append(("role", page.get_by_role(role, name=_ci_regex(name_source))))
 
     if (info.tag in {"button", "a"}) and info.text:
-        cands.append(page.get_by_role("button", name=re.compile(re.escape(info.text), re.I)))
-        cands.append(page.get_by_text(re.compile(re.escape(info.text), re.I)))
-
-    if info.selectors_xpath:
-        cands.append(page.locator(f"xpath={info.selectors_xpath}"))
-
-    if info.name:
-        cands.append(page.locator(f'[name="{info.name}"]'))
-
-    # wait for first visible & enabled candidate
-    for c in cands:
-        try:
-            await c.first.wait_for(state="visible", timeout=3000)
-            # ensure it’s interactable
+        role_cands.append(("button", page.get_by_role("button", name=_ci_regex(info.text))))
+        role_cands.append(("text", page.get_by_text(_ci_regex(info.text))))
+    role_cands.sort(key=lambda kc: -_LOC_WINS[kc[0]])
+
+    def _sel_locator(sel: Dict[str, str]):
+        return page.locator(f"xpath={sel['xpath']}" if "xpath" in sel else sel["css"]).first
+
+    # poll the batch until one is visible, 3s in total rather than per candidate
+    if sels:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + LOCATOR_TIMEOUT_MS / 1000.0
+        while True:
             try:
-                await c.first.wait_for(state="attached", timeout=1000)
+                idx = await page.evaluate(FIRST_VISIBLE_JS, sels)
             except Exception:
-                pass
-            return c.first
+                idx = -1
+            if idx >= 0:
+                loc = _sel_locator(sels[idx])
+                _locator_cache[key] = loc
+                return loc
+            if loop.time() >= deadline:
+                break
+            await asyncio.sleep(0.1)
+
+    # the page had its chance to settle above, so these are checked once
+    for kind, c in role_cands:
+        try:
+            if await c.first.is_visible():
+                _LOC_WINS[kind] += 1
+                _locator_cache[key] = c.first
+                return c.first
         except Exception:
             continue
 
-    return cands[0] if cands else page.locator("html")
+    if sels:
+        return _sel_locator(sels[0])
+    return role_cands[0][1].first if role_cands else page.locator("html")
+
+async def _first_of(waits, timeout_ms: int):
+    # Run the waits concurrently; return when any one finishes (or times out)
+    tasks = [asyncio.create_task(w) for w in waits]
+    done, pending = await asyncio.wait(
+        tasks, timeout=timeout_ms / 1000, return_when=asyncio.FIRST_COMPLETED
+    )
+    for t in pending:
+        t.cancel()
+    for t in done:
+        t.exception()  # timeouts are expected; just mark them retrieved
 
 async def _maybe_wait_for_nav(page: Page, prev_url: str):
-    changed = False
-    if WAIT_FOR_URL_CHANGE:
-        try:
-            changed = await _wait_for_url_change(page, prev_url, timeout_ms=NETWORKIDLE_TIMEOUT_MS)
-        except Exception:
-            changed = False
-    if WAIT_FOR_NETWORKIDLE:
+    # The URL change only tells us a navigation happened (after a goto it
+    # already has); the settling itself is waiting for the new document.
+    changed = page.url != prev_url
+    if not changed and WAIT_FOR_URL_CHANGE:
+        changed = await _wait_for_url_change(page, prev_url, timeout_ms=NETWORKIDLE_TIMEOUT_MS)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=DOMCONTENT_TIMEOUT_MS)
+    except Exception:
+        pass
+    if changed and WAIT_FOR_NETWORKIDLE:
         try:
             await page.wait_for_load_state("networkidle", timeout=NETWORKIDLE_TIMEOUT_MS)
         except Exception:
             pass
-    if not changed:
+
+# True once the document is complete and the DOM has not changed for 150 ms.
+# `reset` restarts the quiet window; a document seen for the first time (e.g.
+# right after a navigation) installs the observer and starts one too.
+DOM_QUIET_JS = """(reset) => {
+  if (!window.__wfQuietObserver) {
+    window.__wfQuietObserver = new MutationObserver(() => { window.__wfLastMutation = performance.now(); });
+    window.__wfQuietObserver.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+    reset = true;
+  }
+  if (reset) window.__wfLastMutation = performance.now();
+  return document.readyState === "complete" && performance.now() - window.__wfLastMutation > 150;
+}"""
+
+async def _adaptive_settle(page: Page, prev_url: str, budget_ms: int = SETTLE_BUDGET_MS):
+    # After a click: stop as soon as the URL changes or the DOM goes quiet,
+    # and never wait longer than budget_ms for either. The quiet window starts
+    # now, so a click whose effect is async still gets >= 150 ms to show it.
+    try:
+        await page.evaluate(DOM_QUIET_JS, True)
+    except Exception:
+        pass
+    waits = [page.wait_for_function(DOM_QUIET_JS, arg=False, polling=50, timeout=budget_ms)]
+    if WAIT_FOR_URL_CHANGE:
+        waits.append(_wait_for_url_change(page, prev_url, timeout_ms=budget_ms))
+    await _first_of(waits, budget_ms)
+    if page.url != prev_url:
         try:
             await page.wait_for_load_state("domcontentloaded", timeout=DOMCONTENT_TIMEOUT_MS)
         except Exception:
             pass
 
 async def _wait_for_url_change(page: Page, prev_url: str, timeout_ms: int = 8000) -> bool:
-    start = time.time()
-    while (time.time() - start) * 1000 < timeout_ms:
-        if page.url != prev_url:
-            return True
-        await asyncio.sleep(0.05)
-    return False
+    # the navigation may already have landed while we were clicking/waiting
+    if page.url != prev_url:
+        return True
+    try:
+        await page.wait_for_event(
+            "framenavigated",
+            predicate=lambda fr: fr == page.main_frame and fr.url != prev_url,
+            timeout=timeout_ms,
+        )
+        return True
+    except Exception:  # timed out, or the page closed/crashed meanwhile
+        return False
+
+# Field predicates are keyed on the identifying attributes (see _field_key) and
+# memoized: a recording fills the same few fields over and over.
+FieldKey = Tuple[Optional[str], ...]
 
-def _looks_like_email_field(info: ElementInfo) -> bool:
-    hay = " ".join(filter(None, [info.id, info.name, info.aria_label, info.title, info.text, info.type]))
-    if info.type and info.type.lower() == "email":
+def _field_key(info: ElementInfo) -> FieldKey:
+    return (info.id, info.name, info.aria_label, info.title, info.text, info.type)
+
+@functools.lru_cache(maxsize=1024)
+def _looks_like_email_field(key: FieldKey) -> bool:
+    typ = key[5]
+    if typ and typ.lower() == "email":
         return True
-    return bool(EMAIL_PAT.search(hay))
+    return bool(EMAIL_PAT.search(" ".join(filter(None, key))))
 
-def _looks_like_password_field(info: ElementInfo) -> bool:
-    if info.type and info.type.lower() == "password":
+@functools.lru_cache(maxsize=1024)
+def _looks_like_password_field(key: FieldKey) -> bool:
+    typ = key[5]
+    if typ and typ.lower() == "password":
         return True
-    hay = " ".join(filter(None, [info.id, info.name, info.aria_label, info.title, info.text]))
-    return bool(PASS_PAT.search(hay))
+    return bool(PASS_PAT.search(" ".join(filter(None, key[:5]))))
 
 async def _fill_locator(locator, value: str) -> bool:
     if not locator:
@@ -189,7 +361,7 @@ async def _autofill_from_selectors(page: Page) -> bool:
         try:
             loc = page.locator(USERNAME_SELECTOR).first
             if await loc.count() > 0 and await _fill_locator(loc, USERNAME):
-                print("↪ filled USERNAME via USERNAME_SELECTOR")
+                log.info("↪ filled USERNAME via USERNAME_SELECTOR")
                 ok_u = True
         except Exception:
             pass
@@ -197,96 +369,271 @@ async def _autofill_from_selectors(page: Page) -> bool:
         try:
             loc = page.locator(PASSWORD_SELECTOR).first
             if await loc.count() > 0 and await _fill_locator(loc, PASSWORD):
-                print("↪ filled PASSWORD via PASSWORD_SELECTOR")
+                log.info("↪ filled PASSWORD via PASSWORD_SELECTOR")
                 ok_p = True
         except Exception:
             pass
     return ok_u and ok_p
 
+USER_FIELD_SEL = (
+    'input[type="email"], input[name*="email" i], input[id*="email" i], '
+    'input[name*="user" i], input[id*="user" i], input[name*="login" i], input[id*="login" i], '
+    '[role="textbox"]'
+)
+PASS_FIELD_SEL = 'input[type="password"], input[name*="pass" i], input[id*="pass" i]'
+
+# For each {tag: selector} pair, finds the first visible, editable match among
+# the first 10 and tags it so Python can address it with a plain attribute
+# selector. Both fields come back from one call: {user: sel|null, pass: sel|null}.
+FIND_LOGIN_JS = """(fields) => {
+  for (const old of document.querySelectorAll("[data-wf-autofill]")) old.removeAttribute("data-wf-autofill");
+  const found = {};
+  for (const [tag, sel] of Object.entries(fields)) {
+    found[tag] = null;
+    const els = Array.from(document.querySelectorAll(sel)).slice(0, 10);
+    for (const el of els) {
+      if (el.hasAttribute("data-wf-autofill")) continue;  // taken by the other field
+      if (el.disabled || el.readOnly || !el.getClientRects().length) continue;
+      if (getComputedStyle(el).visibility === "hidden") continue;
+      el.setAttribute("data-wf-autofill", tag);
+      found[tag] = `[data-wf-autofill="${tag}"]`;
+      break;
+    }
+  }
+  return found;
+}"""
+
 async def _heuristic_autofill(page: Page) -> bool:
-    ok_u = ok_p = False
-    u_cands = page.locator(
-        'input[type="email"], input[name*="email" i], input[id*="email" i], '
-        'input[name*="user" i], input[id*="user" i], input[name*="login" i], input[id*="login" i], '
-        '[role="textbox"]'
-    )
     try:
-        cnt = await u_cands.count()
-        for i in range(min(10, cnt)):
-            el = u_cands.nth(i)
-            try:
-                await el.wait_for(state="visible", timeout=800)
-                if await _fill_locator(el, USERNAME):
-                    print("↪ filled USERNAME via heuristic candidate")
-                    ok_u = True
-                    break
-            except Exception:
-                continue
+        found = await page.evaluate(FIND_LOGIN_JS, {"user": USER_FIELD_SEL, "pass": PASS_FIELD_SEL})
     except Exception:
-        pass
+        return False
+    # filled one after the other: concurrent fills would fight over focus
+    ok_u = bool(found.get("user")) and await _fill_locator(page.locator(found["user"]).first, USERNAME)
+    if ok_u:
+        log.info("↪ filled USERNAME via heuristic candidate")
+    ok_p = bool(found.get("pass")) and await _fill_locator(page.locator(found["pass"]).first, PASSWORD)
+    if ok_p:
+        log.info("↪ filled PASSWORD via heuristic candidate")
+    return ok_u and ok_p
+
+# True if any selector matches; one that querySelector can't parse (e.g. a
+# Playwright-only selector from config) counts as a match, to stay on the safe side
+ANY_MATCH_JS = """(sels) => sels.some(s => {
+  try { return document.querySelector(s) !== null; } catch { return true; }
+})"""
 
-    p_cands = page.locator('input[type="password"], input[name*="pass" i], input[id*="pass" i]')
+async def _has_login_form(page: Page) -> bool:
+    # cheap negative check so non-login pages skip the autofill strategies
+    sels = [s for s in ('input[type="password"]', USERNAME_SELECTOR, PASSWORD_SELECTOR) if s]
     try:
-        cnt = await p_cands.count()
-        for i in range(min(10, cnt)):
-            el = p_cands.nth(i)
-            try:
-                await el.wait_for(state="visible", timeout=800)
-                if await _fill_locator(el, PASSWORD):
-                    print("↪ filled PASSWORD via heuristic candidate")
-                    ok_p = True
-                    break
-            except Exception:
-                continue
+        return await page.evaluate(ANY_MATCH_JS, sels)
     except Exception:
-        pass
-    return ok_u and ok_p
+        return True
 
 async def maybe_autofill_credentials(page: Page):
     if not (USERNAME and PASSWORD):
         return
-    try:
-        await page.wait_for_timeout(200)
-    except Exception:
-        pass
+    await asyncio.sleep(0.2)
+    if not await _has_login_form(page):
+        return
     both = await _autofill_from_selectors(page)
     if both:
         return
     await _heuristic_autofill(page)
 
 def _event_time_ms(ev: Dict[str, Any]) -> Optional[float]:
-    # Expect ISO timestamp in ev["t"]; return epoch-ish ms for pacing. If missing, None.
+    # Expect ISO timestamp in ev["t"]; return epoch ms for pacing. If missing, None.
     t = ev.get("t")
     if not t:
         return None
-    # Fast parse: yyyy-mm-ddTHH:MM:SS.sssZ
     try:
-        # strip Z and split
-        ts = t.rstrip("Z")
-        date, timepart = ts.split("T")
-        y, m, d = (int(x) for x in date.split("-"))
-        hh, mm, ss = timepart.split(":")
-        hh, mm = int(hh), int(mm)
-        if "." in ss:
-            ss, frac = ss.split(".")
-            sec = int(ss)
-            ms = int(float("0."+frac) * 1000)
-        else:
-            sec = int(ss); ms = 0
-        # crude epoch-less relative ms (only used for deltas between consecutive events)
-        return ((hh*3600 + mm*60 + sec) * 1000 + ms)
+        return datetime.fromisoformat(t.replace("Z", "+00:00")).timestamp() * 1000
     except Exception:
         return None
 
+# Browser reuse is explicit: replay() calls made inside `async with
+# browser_pool():` share one Playwright driver + Chromium and each get a fresh
+# context. Outside a pool, replay() launches and closes its own browser.
+# Playwright objects are bound to their event loop, so the pool remembers its
+# loop and is never used from another one.
+_pool = None  # (loop, browser) while a browser_pool() block is open
+
+async def _launch(p):
+    return await p.chromium.launch(headless=HEADLESS, slow_mo=SLOWMO_MS, args=["--start-maximized"])
+
+async def _close_quietly(obj):
+    try:
+        await obj.close()
+    except Exception:
+        pass
+
+@asynccontextmanager
+async def browser_pool():
+    global _pool
+    async with async_playwright() as p:
+        browser = await _launch(p)
+        _pool = (asyncio.get_running_loop(), browser)
+        try:
+            yield
+        finally:
+            _pool = None
+            await _close_quietly(browser)
+
+@asynccontextmanager
+async def browser_context():
+    pool = _pool
+    if pool and pool[0] is asyncio.get_running_loop() and pool[1].is_connected():
+        context = await pool[1].new_context(viewport=VIEWPORT)
+        try:
+            yield context
+        finally:
+            await _close_quietly(context)
+        return
+
+    async with async_playwright() as p:
+        browser = await _launch(p)
+        try:
+            context = await browser.new_context(viewport=VIEWPORT)
+            try:
+                yield context
+            finally:
+                await _close_quietly(context)
+        finally:
+            await _close_quietly(browser)
+
+REPLAY_KEYS = ("Enter", "Tab", "Escape", "ArrowDown", "ArrowUp")
+
+@dataclass
+class ReplayState:
+    page: Page
+    prev_url: str
+
+async def _do_nav(st: ReplayState, i: int, ev: Dict[str, Any]):
+    page = st.page
+    to_url = ev.get("to_url") or ev.get("url")
+    # already there (typically the click before it navigated): nothing to wait for
+    if not (to_url and page.url == to_url):
+        if to_url:
+            log.info(f"[{i}] nav → {to_url}")
+            try:
+                await page.goto(to_url, wait_until="domcontentloaded")
+            except Exception:
+                pass
+        await _maybe_wait_for_nav(page, st.prev_url)
+    st.prev_url = page.url
+    await maybe_autofill_credentials(page)
+    await asyncio.sleep(STEP_DELAY_MS / 1000)
+
+async def _do_click(st: ReplayState, i: int, ev: Dict[str, Any]):
+    page = st.page
+    info = _el_from_event(ev)
+    loc = await _best_locator(page, info)
+
+    label = (info.text or info.aria_label or info.title or "").strip()
+    log.info(f"[{i}] click on {info.tag or ''} {'#'+info.id if info.id else ''} {label}".strip())
+    try:
+        await loc.scroll_into_view_if_needed()
+    except Exception:
+        pass
+    try:
+        await loc.click()
+    except Exception:
+        try:
+            await loc.click(force=True)
+        except Exception as e:
+            log.info(f"  ! click failed: {e}")
+
+    await _adaptive_settle(page, st.prev_url)
+    st.prev_url = page.url
+
+    # reattempt creds after transitional buttons
+    if TRANSITIONAL_PAT.search(label):
+        await maybe_autofill_credentials(page)
+
+async def _do_input(st: ReplayState, i: int, ev: Dict[str, Any]):
+    page = st.page
+    info = _el_from_event(ev)
+    loc = await _best_locator(page, info)
+    recorded_val = ev.get("input_value")
+
+    if recorded_val == REDACTED:
+        value_to_use = None
+        fkey = _field_key(info)
+        if _looks_like_password_field(fkey):
+            value_to_use = PASSWORD
+        elif _looks_like_email_field(fkey):
+            value_to_use = USERNAME
+
+        if value_to_use:
+            log.info(f"[{i}] input (fill inferred {'PASSWORD' if value_to_use==PASSWORD else 'USERNAME'})")
+            try:
+                await _fill_locator(loc, value_to_use)
+            except Exception as e:
+                log.info(f"  ! input failed: {e}")
+        else:
+            log.info(f"[{i}] input (redacted) → cannot infer; skipping")
+    else:
+        log.info(f"[{i}] input → {recorded_val!r}")
+        try:
+            await loc.fill(recorded_val or "")
+        except Exception:
+            try:
+                await loc.click()
+                if recorded_val:
+                    await page.keyboard.type(recorded_val)
+            except Exception as e:
+                log.info(f"  ! input failed: {e}")
+
+    await asyncio.sleep(STEP_DELAY_MS / 1000)
+
+async def _do_keydown(st: ReplayState, i: int, ev: Dict[str, Any]):
+    key = ev.get("key")
+    log.info(f"[{i}] press {key}")
+    try:
+        await st.page.keyboard.press(key)
+    except Exception:
+        pass
+    await asyncio.sleep(STEP_DELAY_MS / 2000)
+
+HANDLERS = {
+    "nav": _do_nav,
+    "click": _do_click,
+    "input": _do_input,
+    "keydown": _do_keydown,
+}
+
+def _dedupe_navs(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Collapse back-to-back navs to the same URL. Only directly adjacent ones:
+    # the recorder doesn't emit pushState navigations, so with anything in
+    # between the page may have moved on (e.g. a Back to the same URL).
+    out = []
+    for ev in events:
+        if ev.get("etype") == "nav" and out and out[-1].get("etype") == "nav":
+            prev = out[-1]
+            if (ev.get("to_url") or ev.get("url")) == (prev.get("to_url") or prev.get("url")):
+                continue
+        out.append(ev)
+    return out
+
+def _replayable(ev: Dict[str, Any]) -> bool:
+    # change/submit/visibility and ordinary typing keys have no replay action
+    et = ev.get("etype")
+    if et == "keydown":
+        return ev.get("key") in REPLAY_KEYS
+    return et in HANDLERS
+
 async def replay(jsonl_path: str):
+    _locator_cache.clear()
+
     # load events
-    events: List[Dict[str, Any]] = []
     with open(jsonl_path, "rb") as f:
-        for line in f:
-            if line.strip():
-                events.append(orjson.loads(line))
+        data = f.read()
+    events: List[Dict[str, Any]] = [
+        orjson.loads(line) for line in data.split(b"\n") if line and not line.isspace()
+    ]
     if not events:
-        print("No events found in JSONL.")
+        log.info("No events found in JSONL.")
         return
 
     # find initial URL
@@ -298,10 +645,13 @@ async def replay(jsonl_path: str):
         if not start_url:
             start_url = ev.get("url")
 
+    # pacing stays relative to the first recorded event, replayed or not
+    base = _event_time_ms(events[0]) or 0.0
+    events = _dedupe_navs([ev for ev in events if _replayable(ev)])
+
     # precompute simple pacing timestamps (relative deltas)
     rel_times = []
     if USE_TIMESTAMP_PACING:
-        base = _event_time_ms(events[0]) or 0.0
         for ev in events:
             t = _event_time_ms(ev)
             if t is None:
@@ -309,10 +659,7 @@ async def replay(jsonl_path: str):
             else:
                 rel_times.append(max(0.0, (t - base)/TIMESCALE))
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=HEADLESS, slow_mo=SLOWMO_MS, args=["--start-maximized"])
-        context = await browser.new_context(viewport=VIEWPORT)
-
+    async with browser_context() as context:
         # optional trace
         if TRACE_ON:
             await context.tracing.start(screenshots=True, snapshots=True, sources=True)
@@ -320,140 +667,51 @@ async def replay(jsonl_path: str):
         page = await context.new_page()
 
         if start_url:
-            print(f"→ navigating to: {start_url}")
+            log.info(f"→ navigating to: {start_url}")
             await page.goto(start_url, wait_until="domcontentloaded")
 
         # initial creds attempt
         await maybe_autofill_credentials(page)
 
-        prev_url = page.url
-        start_clock = time.time()
+        st = ReplayState(page=page, prev_url=page.url)
+        loop = asyncio.get_running_loop()
+        start_clock = loop.time()
 
         for i, ev in enumerate(events):
             # ---- pacing (match recorded rhythm) ----
             if USE_TIMESTAMP_PACING and rel_times[i] is not None:
-                target_s = rel_times[i] / 1000.0
-                elapsed_s = time.time() - start_clock
-                if target_s - elapsed_s > 0:
-                    gap = min(target_s - elapsed_s, MAX_GAP_MS / 1000.0)
-                    await asyncio.sleep(gap)
+                gap = rel_times[i] / 1000.0 - (loop.time() - start_clock)
+                if gap > 0.001:  # not worth a trip through the loop below 1 ms
+                    await asyncio.sleep(min(gap, MAX_GAP_MS / 1000.0))
 
             # ---- event handling ----
-            et = ev.get("etype")
-            if et == "nav":
-                to_url = ev.get("to_url") or ev.get("url")
-                if to_url and page.url != to_url:
-                    print(f"[{i}] nav → {to_url}")
-                    try:
-                        await page.goto(to_url, wait_until="domcontentloaded")
-                    except Exception:
-                        pass
-                await _maybe_wait_for_nav(page, prev_url)
-                prev_url = page.url
-                await maybe_autofill_credentials(page)
-                await page.wait_for_timeout(STEP_DELAY_MS)
-                continue
-
-            if et == "click":
-                info = _el_from_event(ev)
-                loc = await _best_locator(page, info)
-
-                label = (info.text or info.aria_label or info.title or "").strip()
-                print(f"[{i}] click on {info.tag or ''} {'#'+info.id if info.id else ''} {label}".strip())
-                try:
-                    await loc.scroll_into_view_if_needed()
-                except Exception:
-                    pass
-                try:
-                    await loc.click()
-                except Exception:
-                    try:
-                        await loc.click(force=True)
-                    except Exception as e:
-                        print(f"  ! click failed: {e}")
-
-                await page.wait_for_timeout(WAIT_AFTER_CLICK_MS)
-                await _maybe_wait_for_nav(page, prev_url)
-                prev_url = page.url
-
-                # reattempt creds after transitional buttons
-                if re.search(r"(continue|next|login|sign\s*in|submit)", label, re.I):
-                    await maybe_autofill_credentials(page)
-
-                await page.wait_for_timeout(STEP_DELAY_MS)
-                continue
+            await HANDLERS[ev["etype"]](st, i, ev)
 
-            if et == "input":
-                info = _el_from_event(ev)
-                loc = await _best_locator(page, info)
-                recorded_val = ev.get("input_value")
-
-                if recorded_val == REDACTED:
-                    value_to_use = None
-                    if _looks_like_password_field(info):
-                        value_to_use = PASSWORD
-                    elif _looks_like_email_field(info):
-                        value_to_use = USERNAME
-
-                    if value_to_use:
-                        print(f"[{i}] input (fill inferred {'PASSWORD' if value_to_use==PASSWORD else 'USERNAME'})")
-                        try:
-                            await _fill_locator(loc, value_to_use)
-                        except Exception as e:
-                            print(f"  ! input failed: {e}")
-                    else:
-                        print(f"[{i}] input (redacted) → cannot infer; skipping")
-                else:
-                    print(f"[{i}] input → {recorded_val!r}")
-                    try:
-                        await loc.fill(recorded_val or "")
-                    except Exception:
-                        try:
-                            await loc.click()
-                            if recorded_val:
-                                await page.keyboard.type(recorded_val)
-                        except Exception as e:
-                            print(f"  ! input failed: {e}")
-
-                await page.wait_for_timeout(STEP_DELAY_MS)
-                continue
-
-            if et == "keydown":
-                key = ev.get("key")
-                if key in ("Enter", "Tab", "Escape", "ArrowDown", "ArrowUp"):
-                    print(f"[{i}] press {key}")
-                    try:
-                        await page.keyboard.press(key)
-                    except Exception:
-                        pass
-                await page.wait_for_timeout(STEP_DELAY_MS // 2)
-                continue
-
-            # ignore change/submit/visibility
-            await page.wait_for_timeout(50)
-
-        print("✅ replay complete")
+        log.info("✅ replay complete")
 
         if TRACE_ON:
             await context.tracing.stop(path=TRACE_PATH)
-            print(f"📦 trace saved → {TRACE_PATH} (open with: playwright show-trace {TRACE_PATH})")
+            log.info(f"📦 trace saved → {TRACE_PATH} (open with: playwright show-trace {TRACE_PATH})")
 
         if FINAL_PAUSE_SEC > 0:
-            print(f"⏸  keeping window open for {FINAL_PAUSE_SEC}s...")
-            await page.wait_for_timeout(FINAL_PAUSE_SEC * 1000)
-
-        await context.close()
-        await browser.close()
+            log.info(f"⏸  keeping window open for {FINAL_PAUSE_SEC}s...")
+            await asyncio.sleep(FINAL_PAUSE_SEC)
 
 def _usage():
-    print("Usage:\n  python -m replay.runner <path/to/recordings/session-*.jsonl> [--keep-open]")
+    print("Usage:\n  python -m replay.runner <path/to/recordings/session-*.jsonl> [more.jsonl ...] [--keep-open]")
     sys.exit(1)
 
+async def _replay_all(paths: List[str]):
+    async with browser_pool():
+        for path in paths:
+            await replay(path)
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    paths = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not paths:
         _usage()
-    keep = any(a == "--keep-open" for a in sys.argv[2:])
+    keep = any(a == "--keep-open" for a in sys.argv[1:])
     if keep:
         # we're at module scope, so no 'global' needed
         FINAL_PAUSE_SEC = max(FINAL_PAUSE_SEC, 60)
-    asyncio.run(replay(sys.argv[1]))
+    asyncio.run(_replay_all(paths))